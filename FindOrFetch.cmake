@@ -10,6 +10,94 @@ set(USE_GIT_TAG
     false
     CACHE BOOL "Use git clone with GIT_TAG instead of DOWNLOAD_URL when both are provided")
 
+set(FETCHCONTENT_ARCHIVE_CACHE_DIR
+    "${CMAKE_BINARY_DIR}/_deps/archive-cache"
+    CACHE PATH "Extraction cache for dependencies packaged as FETCHCONTENT_ARCHIVE_<NAME>")
+
+set(FETCHCONTENT_ARCHIVE_CACHE_PRUNE
+    true
+    CACHE BOOL "Remove older extractions of a dependency from the archive cache after extracting a new one")
+
+# Extracts FETCHCONTENT_ARCHIVE_<NAME> into the extraction cache on first use and points
+# FETCHCONTENT_SOURCE_DIR_<NAME> at it. Does nothing if the dependency was not packaged as archive.
+macro(_find_or_fetch_extract_archive name)
+    string(TOUPPER "${name}" _archive_upper_name)
+    # FetchContent caches the source dir we hand it, so only a dir outside the extraction cache is a user override
+    set(_archive_overridden FALSE)
+    if(DEFINED FETCHCONTENT_SOURCE_DIR_${_archive_upper_name})
+        string(FIND "${FETCHCONTENT_SOURCE_DIR_${_archive_upper_name}}" "${FETCHCONTENT_ARCHIVE_CACHE_DIR}/"
+                    _archive_cache_pos)
+        if(NOT _archive_cache_pos EQUAL 0)
+            set(_archive_overridden TRUE)
+        endif()
+    endif()
+    if(DEFINED FETCHCONTENT_ARCHIVE_${_archive_upper_name} AND NOT _archive_overridden)
+        set(_archive_file ${FETCHCONTENT_ARCHIVE_${_archive_upper_name}})
+        set(_archive_hash ${FETCHCONTENT_ARCHIVE_HASH_${_archive_upper_name}})
+        if(NOT _archive_hash)
+            file(SHA256 ${_archive_file} _archive_hash)
+        endif()
+        # size and mtime guard against a cached hash outliving a repacked archive
+        file(SIZE ${_archive_file} _archive_size)
+        file(TIMESTAMP ${_archive_file} _archive_mtime "%s" UTC)
+        string(SHA256 _archive_key "${_archive_hash};${_archive_size};${_archive_mtime}")
+        string(SUBSTRING ${_archive_key} 0 16 _archive_short_key)
+        set(_archive_dir ${FETCHCONTENT_ARCHIVE_CACHE_DIR}/${name}-${_archive_short_key})
+
+        if(NOT EXISTS ${_archive_dir}/.extracted)
+            if(NOT PARSED_ARGS_QUIET)
+                message(STATUS "Extracting ${name} from ${_archive_file}")
+            endif()
+
+            # The cache may be shared by parallel configures: every extraction uses its own temporary
+            # directory and is published by an atomic rename, a lost race just means another one won.
+            string(RANDOM LENGTH 12 _archive_suffix)
+            set(_archive_tmp_dir ${_archive_dir}.tmp-${_archive_suffix})
+            file(MAKE_DIRECTORY ${_archive_tmp_dir})
+            execute_process(
+                COMMAND ${CMAKE_COMMAND} -E tar xf ${_archive_file}
+                WORKING_DIRECTORY ${_archive_tmp_dir}
+                RESULT_VARIABLE _archive_status)
+            if(_archive_status AND NOT _archive_status EQUAL 0)
+                file(REMOVE_RECURSE ${_archive_tmp_dir})
+                message(FATAL_ERROR "extracting ${_archive_file} failed!")
+            endif()
+            file(TOUCH ${_archive_tmp_dir}/.extracted)
+            execute_process(
+                COMMAND ${CMAKE_COMMAND} -E rename ${_archive_tmp_dir} ${_archive_dir}
+                RESULT_VARIABLE _archive_status
+                OUTPUT_QUIET ERROR_QUIET)
+            if(_archive_status AND NOT _archive_status EQUAL 0)
+                file(REMOVE_RECURSE ${_archive_tmp_dir})
+                if(NOT EXISTS ${_archive_dir}/.extracted)
+                    message(FATAL_ERROR "moving ${_archive_file} into ${_archive_dir} failed!")
+                endif()
+            endif()
+
+            # every repack gets a new key, drop the published extractions of older archives of this dependency
+            if(FETCHCONTENT_ARCHIVE_CACHE_PRUNE)
+                string(LENGTH "${name}-" _archive_prefix_length)
+                file(
+                    GLOB _archive_siblings
+                    LIST_DIRECTORIES true
+                    ${FETCHCONTENT_ARCHIVE_CACHE_DIR}/${name}-*)
+                foreach(_archive_sibling IN LISTS _archive_siblings)
+                    get_filename_component(_archive_sibling_name ${_archive_sibling} NAME)
+                    string(SUBSTRING ${_archive_sibling_name} ${_archive_prefix_length} -1 _archive_sibling_key)
+                    string(LENGTH "${_archive_sibling_key}" _archive_sibling_key_length)
+                    if(NOT _archive_sibling STREQUAL _archive_dir
+                       AND _archive_sibling_key_length EQUAL 16
+                       AND _archive_sibling_key MATCHES "^[0-9a-f]+$")
+                        file(REMOVE_RECURSE ${_archive_sibling})
+                    endif()
+                endforeach()
+            endif()
+        endif()
+
+        set(FETCHCONTENT_SOURCE_DIR_${_archive_upper_name} ${_archive_dir})
+    endif()
+endmacro()
+
 function(find_or_fetch_package name)
 
     cmake_parse_arguments(
@@ -85,6 +173,8 @@ function(find_or_fetch_package name)
             endif()
         endif()
 
+        _find_or_fetch_extract_archive(${name})
+
         include(FetchContent)
 
         if(USE_GIT_FETCH)
@@ -177,6 +267,8 @@ function(populate_package name)
         PARSE_ARGV 1 PARSED_ARGS "QUIET" "GIT_REPOSITORY;GIT_TAG;GIT_SHALLOW;GIT_BRANCH;SOURCE_SUBDIR"
         "PATCH_COMMAND;UPDATE_COMMAND;PATCH_FILE")
 
+    _find_or_fetch_extract_archive(${name})
+
     # Check for pre-fetched source directory override
     string(TOUPPER "${name}" uppercase_name)
     if(DEFINED FETCHCONTENT_SOURCE_DIR_${uppercase_name})
@@ -2,18 +2,69 @@ set(USE_TIDY_HOST_BUILDS
     true
     CACHE BOOL "enable clang-tidy for host builds")
 
+# Collects the CMake input files of a host source tree. Other build trees (directories holding a CMakeCache.txt) as
+# well as _deps, CMakeFiles and .git are skipped, they only contain generated or fetched files.
+function(_host_build_collect_inputs dir out_var)
+    set(inputs)
+    file(GLOB children LIST_DIRECTORIES true ${dir}/*)
+    foreach(child IN LISTS children)
+        get_filename_component(child_name ${child} NAME)
+        if(IS_DIRECTORY ${child})
+            if(NOT IS_SYMLINK ${child}
+               AND NOT child_name MATCHES "^(_deps|CMakeFiles|\\.git)$"
+               AND NOT EXISTS ${child}/CMakeCache.txt
+               AND NOT child STREQUAL CMAKE_BINARY_DIR)
+                _host_build_collect_inputs(${child} child_inputs)
+                list(APPEND inputs ${child_inputs})
+            endif()
+        elseif(child_name STREQUAL "CMakeLists.txt" OR child_name MATCHES "\\.cmake$")
+            list(APPEND inputs ${child})
+        endif()
+    endforeach()
+
+    set(${out_var}
+        ${inputs}
+        PARENT_SCOPE)
+endfunction()
+
+# Hash over the CMake inputs of a host source tree, computed once per parent configure and shared by all host builds.
+function(_host_build_inputs_hash source_dir out_var)
+    string(MD5 source_dir_key "${source_dir}")
+    get_property(
+        inputs_hash GLOBAL
+        PROPERTY CMAKE_HELPERS_HOST_BUILD_INPUTS_${source_dir_key})
+    if(NOT inputs_hash)
+        _host_build_collect_inputs(${source_dir} host_inputs)
+        list(SORT host_inputs)
+        set(inputs_content)
+        foreach(input IN LISTS host_inputs)
+            file(SHA256 ${input} input_hash)
+            string(APPEND inputs_content "${input_hash} ${input}\n")
+        endforeach()
+        string(SHA256 inputs_hash "${inputs_content}")
+        set_property(GLOBAL PROPERTY CMAKE_HELPERS_HOST_BUILD_INPUTS_${source_dir_key} ${inputs_hash})
+    endif()
+
+    set(${out_var}
+        ${inputs_hash}
+        PARENT_SCOPE)
+endfunction()
+
+function(_host_build_schedule_batch)
+    get_property(batch_scheduled GLOBAL PROPERTY CMAKE_HELPERS_HOST_BUILD_BATCH_SCHEDULED)
+    if(NOT batch_scheduled AND ${CMAKE_VERSION} VERSION_GREATER_EQUAL "3.19.0")
+        cmake_language(DEFER DIRECTORY ${CMAKE_SOURCE_DIR} CALL configure_pending_host_builds)
+        set_property(GLOBAL PROPERTY CMAKE_HELPERS_HOST_BUILD_BATCH_SCHEDULED TRUE)
+    endif()
+endfunction()
+
 function(configure_host_build)
 
-    cmake_parse_arguments(PARSE_ARGV 0 PARSED_ARGS "CLEAR_ENV" "" "FORWARD_VARS")
+    cmake_parse_arguments(PARSE_ARGV 0 PARSED_ARGS "CLEAR_ENV;BATCH" "" "FORWARD_VARS")
 
     set(all_targets ${PARSED_ARGS_UNPARSED_ARGUMENTS})
     list(GET all_targets 0 primary_target)
 
-    set(extra_args)
-    if(${CMAKE_VERSION} VERSION_GREATER_EQUAL "3.19.0")
-        set(extra_args COMMAND_ERROR_IS_FATAL ANY)
-    endif()
-
     if(PARSED_ARGS_CLEAR_ENV)
         unset(ENV{CC})
         unset(ENV{CXX})
@@ -23,15 +74,17 @@ function(configure_host_build)
     set(cmake_extra_args "-G${CMAKE_GENERATOR}")
 
     set(preload_file ${build_dir}/preload.cmake)
+    set(stamp_file ${build_dir}/host_build.stamp)
     file(MAKE_DIRECTORY ${build_dir})
-    file(WRITE ${preload_file} "# Autogenerated preload for host build\n")
+    set(preload_content "# Autogenerated preload for host build\n")
 
     get_cmake_property(all_variables CACHE_VARIABLES)
     foreach(variable_name ${all_variables})
         if(variable_name MATCHES "^USE"
            OR variable_name MATCHES "^TIDY"
            OR variable_name MATCHES "^CMAKE_BUILD_TYPE"
-           OR variable_name MATCHES "^FETCHCONTENT_SOURCE_DIR_")
+           OR variable_name MATCHES "^FETCHCONTENT_SOURCE_DIR_"
+           OR variable_name MATCHES "^FETCHCONTENT_ARCHIVE")
 
             get_property(
                 var_type
@@ -41,7 +94,7 @@ function(configure_host_build)
                 set(var_type STRING)
             endif()
 
-            file(APPEND ${preload_file} "set(${variable_name} \"${${variable_name}}\" CACHE ${var_type} \"\")\n")
+            string(APPEND preload_content "set(${variable_name} \"${${variable_name}}\" CACHE ${var_type} \"\")\n")
         endif()
     endforeach()
 
@@ -53,20 +106,60 @@ function(configure_host_build)
         if(NOT var_type)
             set(var_type STRING)
         endif()
-        file(APPEND ${preload_file} "set(${variable_name} \"${${variable_name}}\" CACHE ${var_type} \"\" FORCE)\n")
+        string(APPEND preload_content "set(${variable_name} \"${${variable_name}}\" CACHE ${var_type} \"\" FORCE)\n")
     endforeach()
 
     if(NOT USE_TIDY_HOST_BUILDS)
-        file(APPEND ${preload_file} "set(USE_TIDY OFF CACHE BOOL \"\" FORCE)\n")
+        string(APPEND preload_content "set(USE_TIDY OFF CACHE BOOL \"\" FORCE)\n")
     endif()
 
-    execute_process(
-        COMMAND ${CMAKE_COMMAND} -C ${preload_file} -S ${CMAKE_CURRENT_LIST_DIR} -B ${build_dir} ${cmake_extra_args}
-        WORKING_DIRECTORY ${CMAKE_CURRENT_BINARY_DIR}
-        RESULT_VARIABLE STATUS ${extra_args})
+    # A batched configure runs later, so clearing the environment has to travel with the command.
+    set(env_args)
+    if(PARSED_ARGS_CLEAR_ENV)
+        set(env_args ${CMAKE_COMMAND} -E env --unset=CC --unset=CXX)
+    endif()
 
-    if(STATUS AND NOT STATUS EQUAL 0)
-        message(FATAL_ERROR "configuring ${primary_target} failed!")
+    set(configure_command ${env_args} ${CMAKE_COMMAND} -C ${preload_file} -S ${CMAKE_CURRENT_LIST_DIR} -B ${build_dir}
+                          ${cmake_extra_args})
+
+    # The nested configure is skipped when neither the preload, the command nor the host CMake inputs changed.
+    _host_build_inputs_hash(${CMAKE_CURRENT_LIST_DIR} inputs_hash)
+    string(SHA256 stamp_hash "${preload_content}${configure_command}\n${inputs_hash}")
+
+    set(previous_stamp_hash)
+    if(EXISTS ${stamp_file} AND EXISTS ${build_dir}/CMakeCache.txt)
+        file(READ ${stamp_file} previous_stamp_hash)
+    endif()
+
+    if(previous_stamp_hash STREQUAL stamp_hash)
+        message(STATUS "Host build ${primary_target} is up to date, skipping configure")
+    else()
+        file(REMOVE ${stamp_file})
+        file(WRITE ${preload_file} "${preload_content}")
+
+        if(PARSED_ARGS_BATCH)
+            set_property(GLOBAL APPEND PROPERTY CMAKE_HELPERS_HOST_BUILD_QUEUE ${primary_target})
+            set_property(GLOBAL PROPERTY CMAKE_HELPERS_HOST_BUILD_${primary_target}_DIR ${build_dir})
+            set_property(GLOBAL PROPERTY CMAKE_HELPERS_HOST_BUILD_${primary_target}_COMMAND ${configure_command})
+            set_property(GLOBAL PROPERTY CMAKE_HELPERS_HOST_BUILD_${primary_target}_STAMP ${stamp_hash})
+            _host_build_schedule_batch()
+        else()
+            set(extra_args)
+            if(${CMAKE_VERSION} VERSION_GREATER_EQUAL "3.19.0")
+                set(extra_args COMMAND_ERROR_IS_FATAL ANY)
+            endif()
+
+            execute_process(
+                COMMAND ${configure_command}
+                WORKING_DIRECTORY ${CMAKE_CURRENT_BINARY_DIR}
+                RESULT_VARIABLE STATUS ${extra_args})
+
+            if(STATUS AND NOT STATUS EQUAL 0)
+                message(FATAL_ERROR "configuring ${primary_target} failed!")
+            endif()
+
+            file(WRITE ${stamp_file} "${stamp_hash}")
+        endif()
     endif()
 
     add_custom_target(
@@ -85,3 +178,70 @@ function(configure_host_build)
     endforeach()
 
 endfunction()
+
+# Configures all host builds declared with BATCH in parallel. Called automatically at the end of the top level
+# directory on CMake >= 3.19, older versions have to call it after the last configure_host_build(... BATCH).
+function(configure_pending_host_builds)
+
+    get_property(pending GLOBAL PROPERTY CMAKE_HELPERS_HOST_BUILD_QUEUE)
+    if(NOT pending)
+        return()
+    endif()
+    set_property(GLOBAL PROPERTY CMAKE_HELPERS_HOST_BUILD_QUEUE "")
+
+    # ctest ships with CMake and runs independent commands in parallel with per command output capture.
+    set(batch_dir ${CMAKE_BINARY_DIR}/host_build_batch)
+    set(batch_file ${batch_dir}/CTestTestfile.cmake)
+    file(MAKE_DIRECTORY ${batch_dir})
+    file(WRITE ${batch_file} "# Autogenerated batch of host build configures\n")
+
+    foreach(primary_target IN LISTS pending)
+        get_property(configure_command GLOBAL PROPERTY CMAKE_HELPERS_HOST_BUILD_${primary_target}_COMMAND)
+        set(quoted_command)
+        foreach(arg IN LISTS configure_command)
+            string(APPEND quoted_command " [==[${arg}]==]")
+        endforeach()
+        file(APPEND ${batch_file} "add_test([==[${primary_target}]==]${quoted_command})\n")
+    endforeach()
+
+    list(LENGTH pending pending_count)
+    cmake_host_system_information(RESULT jobs QUERY NUMBER_OF_LOGICAL_CORES)
+    if(pending_count LESS jobs)
+        set(jobs ${pending_count})
+    endif()
+
+    message(STATUS "Configuring ${pending_count} host builds with ${jobs} jobs: ${pending}")
+
+    execute_process(
+        COMMAND ${CMAKE_CTEST_COMMAND} --output-on-failure -j${jobs}
+        WORKING_DIRECTORY ${batch_dir}
+        RESULT_VARIABLE STATUS)
+
+    # Stamps of successful configures are written even if another one failed, so only the failed ones are redone.
+    set(failed)
+    if(STATUS AND NOT STATUS EQUAL 0)
+        set(failed_log ${batch_dir}/Testing/Temporary/LastTestsFailed.log)
+        if(EXISTS ${failed_log})
+            file(STRINGS ${failed_log} failed_lines)
+            foreach(line IN LISTS failed_lines)
+                string(REGEX REPLACE "^[0-9]+:" "" failed_target "${line}")
+                list(APPEND failed ${failed_target})
+            endforeach()
+        else()
+            set(failed ${pending})
+        endif()
+    endif()
+
+    foreach(primary_target IN LISTS pending)
+        if(NOT primary_target IN_LIST failed)
+            get_property(build_dir GLOBAL PROPERTY CMAKE_HELPERS_HOST_BUILD_${primary_target}_DIR)
+            get_property(stamp_hash GLOBAL PROPERTY CMAKE_HELPERS_HOST_BUILD_${primary_target}_STAMP)
+            file(WRITE ${build_dir}/host_build.stamp "${stamp_hash}")
+        endif()
+    endforeach()
+
+    if(failed)
+        message(FATAL_ERROR "configuring host builds failed: ${failed}")
+    endif()
+
+endfunction()
@@ -2,7 +2,11 @@ set(USE_CPPCHECK
     false
     CACHE BOOL "cppcheck")
 
-if(USE_CPPCHECK)
+set(USE_CPPCHECK_PROJECT
+    false
+    CACHE BOOL "run cppcheck once on compile_commands.json instead of per target")
+
+if(USE_CPPCHECK OR USE_CPPCHECK_PROJECT)
     find_program(
         CPPCHECK_EXE
         NAMES "cppcheck"
@@ -21,6 +25,21 @@ if(USE_CPPCHECK)
         set(cxx_cppcheck_disabled_checks ${GLOBAL_CXX_CPPCHECK_DISABLED_CHECKS})
         set(c_cppcheck_disabled_checks ${GLOBAL_C_CPPCHECK_DISABLED_CHECKS})
 
+        # project mode analyses C and C++ in one run, so the language specific suppressions are scoped by extension;
+        # .h is shared by both languages and gets the suppressions of both, like the headers of a per-target run
+        set(project_cppcheck_suppressions "*:*third_party*" "*:${CMAKE_BINARY_DIR}/_deps/*"
+                                          ${common_cppcheck_disabled_checks})
+        foreach(check IN LISTS cxx_cppcheck_disabled_checks)
+            foreach(extension cpp cxx cc c++ h hpp hxx hh h++ ipp)
+                list(APPEND project_cppcheck_suppressions "${check}:*.${extension}")
+            endforeach()
+        endforeach()
+        foreach(check IN LISTS c_cppcheck_disabled_checks)
+            foreach(extension c h)
+                list(APPEND project_cppcheck_suppressions "${check}:*.${extension}")
+            endforeach()
+        endforeach()
+
         list(TRANSFORM common_cppcheck_disabled_checks PREPEND "--suppress=")
         list(JOIN common_cppcheck_disabled_checks ";" common_cppcheck_disabled_checks)
 
@@ -38,9 +57,62 @@ if(USE_CPPCHECK)
     endif()
 endif()
 
+if(USE_CPPCHECK_PROJECT AND NOT TARGET cppcheck)
+    find_package(
+        Python3
+        COMPONENTS Interpreter
+        REQUIRED)
+
+    cmake_host_system_information(RESULT cppcheck_default_jobs QUERY NUMBER_OF_LOGICAL_CORES)
+    set(CPPCHECK_JOBS
+        ${cppcheck_default_jobs}
+        CACHE STRING "number of parallel cppcheck jobs in project mode")
+    mark_as_advanced(CPPCHECK_JOBS)
+
+    set(CMAKE_EXPORT_COMPILE_COMMANDS ON)
+
+    set(cppcheck_build_dir ${CMAKE_BINARY_DIR}/cppcheck)
+    set(cppcheck_suppressions_file ${cppcheck_build_dir}/suppressions.txt)
+    set(cppcheck_project_file ${cppcheck_build_dir}/compile_commands.json)
+    set(cppcheck_xml_report ${cppcheck_build_dir}/cppcheck.xml)
+    set(cppcheck_json_report ${cppcheck_build_dir}/cppcheck.json)
+
+    file(MAKE_DIRECTORY ${cppcheck_build_dir}/cache)
+    list(JOIN project_cppcheck_suppressions "\n" cppcheck_suppressions_content)
+    file(
+        GENERATE
+        OUTPUT ${cppcheck_suppressions_file}
+        CONTENT "${cppcheck_suppressions_content}\n")
+
+    # only translation units of targets registered through target_add_cppcheck_flags are analysed
+    add_custom_target(
+        cppcheck
+        COMMAND ${Python3_EXECUTABLE} ${CMAKE_CURRENT_LIST_DIR}/scripts/cppcheck_project.py
+                ${CMAKE_BINARY_DIR}/compile_commands.json ${cppcheck_project_file}
+                "$<TARGET_PROPERTY:cppcheck,CPPCHECK_SOURCE_LISTS>"
+        COMMAND
+            ${CPPCHECK_EXE} -q --enable=all --project=${cppcheck_project_file}
+            --cppcheck-build-dir=${cppcheck_build_dir}/cache -j${CPPCHECK_JOBS}
+            --suppressions-list=${cppcheck_suppressions_file} --xml --output-file=${cppcheck_xml_report}
+        COMMAND ${Python3_EXECUTABLE} ${CMAKE_CURRENT_LIST_DIR}/scripts/cppcheck_report.py ${cppcheck_xml_report}
+                ${cppcheck_json_report}
+        WORKING_DIRECTORY ${CMAKE_BINARY_DIR}
+        BYPRODUCTS ${cppcheck_project_file} ${cppcheck_xml_report} ${cppcheck_json_report}
+        COMMENT "Running cppcheck on compile_commands.json"
+        COMMAND_EXPAND_LISTS VERBATIM)
+endif()
+
 function(target_add_cppcheck_flags target)
-    if(USE_CPPCHECK)
+    if(USE_CPPCHECK AND NOT USE_CPPCHECK_PROJECT)
         set_target_properties(${target} PROPERTIES CXX_CPPCHECK "${DO_CPPCHECK_CXX}")
         set_target_properties(${target} PROPERTIES C_CPPCHECK "${DO_CPPCHECK_C}")
     endif()
+    if(USE_CPPCHECK_PROJECT)
+        set(source_list ${CMAKE_BINARY_DIR}/cppcheck/targets/${target}.txt)
+        file(
+            GENERATE
+            OUTPUT ${source_list}
+            CONTENT "$<TARGET_PROPERTY:${target},SOURCE_DIR>\n$<JOIN:$<TARGET_PROPERTY:${target},SOURCES>,\n>\n")
+        set_property(TARGET cppcheck APPEND PROPERTY CPPCHECK_SOURCE_LISTS ${source_list})
+    endif()
 endfunction()
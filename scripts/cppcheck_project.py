@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Reduce compile_commands.json to the sources of cppcheck-enabled targets.
+
+Project mode runs cppcheck on a compilation database. The full database also
+lists every FetchContent dependency built through add_subdirectory, while the
+per-target mode only checks targets registered with
+target_add_cppcheck_flags(). This keeps both modes on the same scope.
+
+Each source list is written by cppcheck.cmake at generate time: the first
+line is the target's SOURCE_DIR, every following line one entry of its
+SOURCES property (relative entries are resolved against SOURCE_DIR).
+
+Usage:
+    cppcheck_project.py <compile_commands.json> <output_json> <source_list>...
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+
+def read_source_list(source_list: Path) -> set[str]:
+    """Return the normalized absolute source paths of one target."""
+    lines = [line for line in source_list.read_text().splitlines() if line]
+    if not lines:
+        return set()
+    source_dir, sources = lines[0], lines[1:]
+    return {os.path.normpath(os.path.join(source_dir, src)) for src in sources}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Filter compile_commands.json to cppcheck-enabled targets.'
+    )
+    parser.add_argument('compile_commands', help='Full compile_commands.json')
+    parser.add_argument('output_file', help='Path to write the filtered database')
+    parser.add_argument('source_lists', nargs='*', metavar='source_list',
+                        help='Per-target source lists written by cppcheck.cmake')
+    args = parser.parse_args()
+
+    wanted: set[str] = set()
+    for source_list in args.source_lists:
+        wanted |= read_source_list(Path(source_list))
+
+    entries = json.loads(Path(args.compile_commands).read_text())
+    selected = [
+        entry for entry in entries
+        if os.path.normpath(os.path.join(entry['directory'], entry['file'])) in wanted
+    ]
+
+    output = Path(args.output_file)
+    output.write_text(json.dumps(selected, indent=2) + '\n')
+    print(f'cppcheck: {len(selected)} of {len(entries)} translation units selected')
+
+
+if __name__ == '__main__':
+    main()
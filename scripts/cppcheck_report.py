@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Aggregate a cppcheck XML report into a deduplicated JSON report.
+
+In project mode cppcheck analyses every translation unit listed in
+compile_commands.json, so a finding in a shared header is reported once per
+TU that includes it. This collector merges those duplicates, records which
+TUs triggered each finding and writes a single machine-readable summary.
+
+Usage:
+    cppcheck_report.py <cppcheck_xml> <output_json> [--error-exitcode <n>]
+
+  --error-exitcode <n>  Exit with <n> if any finding remains after dedup
+                        (default: 0, i.e. report only).
+"""
+
+import argparse
+import json
+import sys
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+
+def parse_findings(xml_file: Path) -> list[dict]:
+    """Return one dict per <error> element of a cppcheck version 2 XML report."""
+    root = ET.parse(xml_file).getroot()
+    findings = []
+    for error in root.iter('error'):
+        locations = [
+            {
+                'file': loc.get('file', ''),
+                'line': int(loc.get('line', 0)),
+                'column': int(loc.get('column', 0)),
+                'info': loc.get('info', ''),
+            }
+            for loc in error.iter('location')
+        ]
+        primary = locations[0] if locations else {'file': '', 'line': 0, 'column': 0}
+        findings.append({
+            'id': error.get('id', ''),
+            'severity': error.get('severity', ''),
+            'message': error.get('msg', ''),
+            'verbose': error.get('verbose', ''),
+            'cwe': int(error.get('cwe', 0)),
+            'file': primary['file'],
+            'line': primary['line'],
+            'column': primary['column'],
+            'locations': locations,
+            'translation_unit': error.get('file0') or primary['file'],
+        })
+    return findings
+
+
+def dedupe(findings: list[dict]) -> list[dict]:
+    """Merge findings with the same id, message and primary location."""
+    merged: dict[tuple, dict] = {}
+    for finding in findings:
+        key = (finding['id'], finding['message'],
+               finding['file'], finding['line'], finding['column'])
+        tu = finding.pop('translation_unit')
+        entry = merged.setdefault(key, {**finding, 'translation_units': []})
+        if tu and tu not in entry['translation_units']:
+            entry['translation_units'].append(tu)
+    for entry in merged.values():
+        entry['translation_units'].sort()
+    return sorted(merged.values(),
+                  key=lambda f: (f['file'], f['line'], f['column'], f['id']))
+
+
+def summarize(findings: list[dict]) -> dict:
+    by_severity: dict[str, int] = {}
+    by_id: dict[str, int] = {}
+    for finding in findings:
+        by_severity[finding['severity']] = by_severity.get(finding['severity'], 0) + 1
+        by_id[finding['id']] = by_id.get(finding['id'], 0) + 1
+    return {
+        'total': len(findings),
+        'by_severity': dict(sorted(by_severity.items())),
+        'by_id': dict(sorted(by_id.items())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Deduplicate and aggregate a cppcheck XML report into JSON.'
+    )
+    parser.add_argument('xml_file', help='cppcheck --xml output')
+    parser.add_argument('output_file', help='Path to write the JSON report')
+    parser.add_argument('--error-exitcode', metavar='N', type=int, default=0,
+                        help='Exit code if findings remain (default: 0)')
+    args = parser.parse_args()
+
+    raw = parse_findings(Path(args.xml_file))
+    findings = dedupe(raw)
+    summary = summarize(findings)
+
+    report = {
+        'tool': 'cppcheck',
+        'summary': {**summary, 'raw_total': len(raw)},
+        'findings': findings,
+    }
+
+    output = Path(args.output_file)
+    output.write_text(json.dumps(report, indent=2) + '\n')
+
+    for finding in findings:
+        print(f"{finding['file']}:{finding['line']}:{finding['column']}: "
+              f"{finding['severity']}: {finding['message']} [{finding['id']}]",
+              file=sys.stderr)
+    print(f"cppcheck: {summary['total']} unique findings "
+          f"({len(raw)} before dedup), report: {output}")
+
+    if findings and args.error_exitcode:
+        sys.exit(args.error_exitcode)
+
+
+if __name__ == '__main__':
+    main()
@@ -301,19 +301,26 @@ def detect_license(src_dir: Path) -> str:
     return 'LicenseRef-unknown'
 
 
-def compute_checksum(src_dir: Path) -> str:
-    """SHA-256 of the sorted concatenation of all file hashes (excluding .git)."""
-    files = sorted(
-        p for p in src_dir.rglob('*')
+def file_hashes(src_dir: Path) -> dict[str, str]:
+    """SHA-256 of every file below src_dir (excluding .git), keyed by relative path."""
+    return {
+        str(p.relative_to(src_dir)): hashlib.sha256(p.read_bytes()).hexdigest()
+        for p in src_dir.rglob('*')
         if p.is_file() and '.git' not in p.parts
-    )
-    parts = []
-    for f in files:
-        h = hashlib.sha256(f.read_bytes()).hexdigest()
-        parts.append(f'{h}  {f.relative_to(src_dir)}')
+    }
+
+
+def checksum_from_hashes(hashes: dict[str, str]) -> str:
+    """SHA-256 of the sorted concatenation of the given per-file hashes."""
+    parts = [f'{hashes[rel]}  {rel}' for rel in sorted(hashes, key=Path)]
     return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
 
 
+def compute_checksum(src_dir: Path) -> str:
+    """SHA-256 of the sorted concatenation of all file hashes (excluding .git)."""
+    return checksum_from_hashes(file_hashes(src_dir))
+
+
 _GITHUB_RE = re.compile(r'github\.com[/:]([^/]+)/([^/.]+?)(?:\.git)?$')
 
 
@@ -445,57 +452,41 @@ def build_root_component(package_name: str, package_version: str, source_dir: Pa
     return comp
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description='Generate a CycloneDX 1.6 SBOM from CMake FetchContent source dirs.'
-    )
-    parser.add_argument('output_file', help='Path to write sbom.json')
-    parser.add_argument('package_name', help='Name of the top-level package')
-    parser.add_argument('package_version',
-                        help='Version of the top-level package')
-    parser.add_argument('--source-dir', metavar='DIR',
-                        help='Root source dir of the application (for metadata.component)')
-    parser.add_argument('src_dirs', nargs='+', metavar='src_dir',
-                        help='Source directories to include as components')
-    args = parser.parse_args()
+def scan_component(src_dir: Path, hashes: dict[str, str] | None = None):
+    """Collect the SBOM data of one dependency source dir, or None if it can't be described.
+
+    Pass hashes from file_hashes() to reuse them instead of reading every file again.
+    """
+    name = src_dir.name.removesuffix('-src')
+    if not (src_dir / '.git').is_dir():
+        print(
+            f'  WARNING: {name} has no .git — omitted from SBOM', file=sys.stderr)
+        return None
+
+    repo_url = git('remote', 'get-url', 'origin', cwd=src_dir) or 'unknown'
+    commit_sha = git('rev-parse', 'HEAD', cwd=src_dir) or 'unknown'
+    return {
+        'purl': build_purl(repo_url, commit_sha),
+        'version': detect_version(src_dir),
+        'repo_url': repo_url,
+        'commit_sha': commit_sha,
+        'license': detect_license(src_dir),
+        'checksum': (compute_checksum(src_dir) if hashes is None
+                     else checksum_from_hashes(hashes)),
+    }
 
-    source_dir = Path(args.source_dir) if args.source_dir else None
 
+def build_sbom(package_name: str, package_version: str, source_dir,
+               scanned: list) -> dict:
+    """Assemble the CycloneDX document from (name, scan_component data) pairs in order."""
     ordered_names = []
     all_data = {}  # name → {purl, version, repo_url, commit_sha, license, checksum}
 
-    for src_str in args.src_dirs:
-        src_dir = Path(src_str)
-        if not src_dir.is_dir():
-            print(
-                f'WARNING: {src_dir} is not a directory — skipping', file=sys.stderr)
+    for name, data in scanned:
+        if name in all_data or data is None:
             continue
-
-        name = src_dir.name.removesuffix('-src')
-        if name in all_data:
-            continue
-
-        if not (src_dir / '.git').is_dir():
-            print(
-                f'  WARNING: {name} has no .git — omitted from SBOM', file=sys.stderr)
-            continue
-
-        repo_url = git('remote', 'get-url', 'origin', cwd=src_dir) or 'unknown'
-        commit_sha = git('rev-parse', 'HEAD', cwd=src_dir) or 'unknown'
-        version = detect_version(src_dir)
-        checksum = compute_checksum(src_dir)
-        license_id = detect_license(src_dir)
-        purl = build_purl(repo_url, commit_sha)
-
         ordered_names.append(name)
-        all_data[name] = {
-            'purl': purl,
-            'version': version,
-            'repo_url': repo_url,
-            'commit_sha': commit_sha,
-            'license': license_id,
-            'checksum': checksum,
-        }
+        all_data[name] = data
 
     purl_groups: dict[str, list[str]] = {}
     for name in ordered_names:
@@ -537,17 +528,17 @@ def main():
         ))
 
     root_comp = build_root_component(
-        args.package_name, args.package_version, source_dir)
+        package_name, package_version, source_dir)
 
     timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
     serial = str(uuid.uuid4())
 
     dependencies = [
-        {'ref': args.package_name, 'dependsOn': emitted_canonicals},
+        {'ref': package_name, 'dependsOn': emitted_canonicals},
         *[{'ref': cn, 'dependsOn': []} for cn in emitted_canonicals],
     ]
 
-    sbom = {
+    return {
         'bomFormat': 'CycloneDX',
         'specVersion': '1.6',
         'version': 1,
@@ -567,15 +558,56 @@ def main():
         'compositions': [
             {
                 'aggregate': 'incomplete',
-                'assemblies': [args.package_name, *emitted_canonicals],
+                'assemblies': [package_name, *emitted_canonicals],
             }
         ],
     }
 
-    output = Path(args.output_file)
+
+def write_sbom(output: Path, sbom: dict):
     output.write_text(json.dumps(sbom, indent=2) + '\n')
     print(f'SBOM generated: {output}')
 
 
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate a CycloneDX 1.6 SBOM from CMake FetchContent source dirs.'
+    )
+    parser.add_argument('output_file', help='Path to write sbom.json')
+    parser.add_argument('package_name', help='Name of the top-level package')
+    parser.add_argument('package_version',
+                        help='Version of the top-level package')
+    parser.add_argument('--source-dir', metavar='DIR',
+                        help='Root source dir of the application (for metadata.component)')
+    parser.add_argument('src_dirs', nargs='+', metavar='src_dir',
+                        help='Source directories to include as components')
+    args = parser.parse_args()
+
+    source_dir = Path(args.source_dir) if args.source_dir else None
+
+    scanned = []
+    seen_names: set[str] = set()
+
+    for src_str in args.src_dirs:
+        src_dir = Path(src_str)
+        if not src_dir.is_dir():
+            print(
+                f'WARNING: {src_dir} is not a directory — skipping', file=sys.stderr)
+            continue
+
+        name = src_dir.name.removesuffix('-src')
+        if name in seen_names:
+            continue
+
+        data = scan_component(src_dir)
+        if data is not None:
+            seen_names.add(name)
+        scanned.append((name, data))
+
+    sbom = build_sbom(args.package_name, args.package_version,
+                      source_dir, scanned)
+    write_sbom(Path(args.output_file), sbom)
+
+
 if __name__ == '__main__':
     main()
@@ -6,27 +6,57 @@ download all dependencies), then copies all fetched *-src directories into an
 output package and generates a CMake preload file with FETCHCONTENT_SOURCE_DIR_*
 variables for each dependency, enabling fully offline builds.
 
+The configure output is streamed: as soon as CMake reports
+"Successfully fetched <name>" the dependency is copied (and scanned for the
+SBOM) on a worker thread while CMake keeps fetching the next one. A final
+sweep over the build dir picks up anything that was not announced, so the
+result is the same as processing everything after configure.
+
+With --archive every dependency is stored as <dep>.tar.gz instead of a
+directory. The preload then sets FETCHCONTENT_ARCHIVE_<DEP> and its hash, and
+FindOrFetch.cmake extracts an archive only when that dependency is requested.
+
+With --watch the script keeps running after packaging and uses inotify (Linux)
+on the *-src trees to push only changed files into the package, updating the
+affected SBOM checksums from cached per-file hashes. Bursts of events (e.g. a
+git checkout in a patched dependency) are collected until the tree has been
+quiet for --debounce seconds.
+
 Usage:
-    package_cmake_deps.py [--sbom] [--work-dir <dir>] [--exclude <dep>]... [name]
+    package_cmake_deps.py [--sbom] [--archive] [--work-dir <dir> [--watch]]
+                          [--exclude <dep>]... [name]
     OUTPUT_DIR=/path/to/output package_cmake_deps.py [options] [name]
 
   --sbom              Generate a CycloneDX 1.6 SBOM (sbom.json) alongside the package.
+  --archive           Package each dependency as a compressed archive, extracted on demand.
   --work-dir <dir>    Use <dir> as the CMake build directory instead of a temp dir.
                       The directory is NOT deleted on exit, making subsequent runs faster
                       (CMake reuses the already-fetched sources).
   --exclude <dep>     Exclude a dependency by name from both the package and the SBOM.
                       May be repeated: --exclude foo --exclude bar
+  --watch             After packaging, keep the package in sync with edits to the
+                      fetched sources until interrupted. Requires --work-dir.
+  --debounce <sec>    Quiet period before a burst of changes is applied (default: 0.5).
 """
 
 import argparse
+import ctypes
 import filecmp
+import hashlib
 import os
+import re
+import select
 import shutil
+import struct
 import subprocess
 import sys
+import tarfile
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import generate_sbom
+
 
 def git(*args, cwd=None):
     """Run a git command, return stdout stripped, or '' on failure."""
@@ -63,6 +93,374 @@ def dirs_equal(a: Path, b: Path) -> bool:
     return all(dirs_equal(a / sub, b / sub) for sub in cmp.common_dirs)
 
 
+def write_archive(src_dir: Path, archive: Path) -> str:
+    """Pack src_dir (without .git/.github) into a .tar.gz, return its SHA-256."""
+    def skip_vcs(info):
+        return None if Path(info.name).name in ('.git', '.github') else info
+
+    with tarfile.open(archive, 'w:gz', compresslevel=6) as tar:
+        tar.add(src_dir, arcname='.', filter=skip_vcs)
+
+    h = hashlib.sha256()
+    with archive.open('rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+_FETCHED_RE = re.compile(r'^-- Successfully fetched (\S+)\s*$')
+
+
+def announced_src_dirs(build_dir: Path, dep_name: str) -> list[Path]:
+    """Return the top-level _deps source dirs a 'Successfully fetched' line refers to.
+
+    FetchContent lowercases the directory name, populate_package keeps it as
+    given. Deps populated elsewhere are left to the final sweep.
+    """
+    deps_dir = build_dir / '_deps'
+    candidates = dict.fromkeys([deps_dir / f'{dep_name.lower()}-src',
+                                deps_dir / f'{dep_name}-src'])
+    return [p for p in candidates if p.is_dir()]
+
+
+def run_cmake_streaming(cmd: list[str], on_fetched):
+    """Run cmake, echo its stdout and call on_fetched(name) for every fetched dep."""
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True, bufsize=1,
+                            errors='replace')
+    with proc.stdout:
+        for line in proc.stdout:
+            sys.stdout.write(line)
+            m = _FETCHED_RE.match(line)
+            if m:
+                on_fetched(m.group(1))
+    if proc.wait() != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+
+class DependencyPipeline:
+    """Copy and SBOM-scan dependency source dirs on a thread pool as they appear."""
+
+    def __init__(self, pool: ThreadPoolExecutor, output_dir: Path,
+                 exclude: list[str], sbom: bool, archive: bool = False,
+                 keep_hashes: bool = False):
+        self.pool = pool
+        self.output_dir = output_dir
+        self.exclude = set(exclude)
+        self.sbom = sbom
+        self.archive = archive
+        self.keep_hashes = keep_hashes
+        self.copied_deps: dict[str, Path] = {}  # name → source path copied
+        self.archive_hashes: dict[str, str] = {}  # name → archive SHA-256
+        self.seen: dict[str, list[Path]] = {}  # name → all source paths
+        self.copies = {}  # name → future of the copy/archive task
+        self.scans = {}  # source path → future of scan_component()
+        self.file_hashes: dict[Path, dict[str, str]] = {}  # only with keep_hashes
+        self.sbom_paths: dict[str, Path] = {}  # name → source path in the SBOM
+
+    def submit(self, src_dir: Path):
+        dep_name = src_dir.name.removesuffix('-src')
+        if dep_name in self.exclude or src_dir in self.seen.get(dep_name, []):
+            return
+        self.seen.setdefault(dep_name, []).append(src_dir)
+
+        if dep_name in self.copied_deps:
+            return
+
+        print(f'  {dep_name}')
+        self.copied_deps[dep_name] = src_dir
+        if self.archive:
+            self.copies[dep_name] = self.pool.submit(
+                write_archive, src_dir, self.output_dir / f'{dep_name}.tar.gz')
+        else:
+            self.copies[dep_name] = self.pool.submit(
+                shutil.copytree, src_dir, self.output_dir / dep_name,
+                ignore=shutil.ignore_patterns('.git', '.github'),
+            )
+        if self.sbom:
+            self.scan(src_dir)
+
+    def scan(self, src_dir: Path):
+        if src_dir not in self.scans:
+            self.scans[src_dir] = self.pool.submit(self._scan, src_dir)
+        return self.scans[src_dir]
+
+    def _scan(self, src_dir: Path):
+        if not self.keep_hashes:
+            return generate_sbom.scan_component(src_dir)
+        hashes = generate_sbom.file_hashes(src_dir)
+        self.file_hashes[src_dir] = hashes
+        return generate_sbom.scan_component(src_dir, hashes)
+
+    def finish(self, src_dirs: list[Path]) -> list:
+        """Process the remaining src_dirs, wait for all work and return SBOM scans.
+
+        src_dirs is the full sorted list from find_src_dirs(); the returned
+        (name, data) pairs follow it exactly like generate_sbom.py would.
+        """
+        for src_dir in src_dirs:
+            self.submit(src_dir)
+
+        for dep_name, future in self.copies.items():
+            result = future.result()
+            if self.archive:
+                self.archive_hashes[dep_name] = result
+
+        for dep_name, paths in sorted(self.seen.items()):
+            first = self.copied_deps[dep_name]
+            for other in paths:
+                if other == first:
+                    continue
+                if dirs_equal(first, other):
+                    print(f'  {dep_name} (skipped, duplicate)')
+                    continue
+                print(f'ERROR: Duplicate dependency {dep_name!r} with different content:',
+                      file=sys.stderr)
+                print(f'  First:  {first}', file=sys.stderr)
+                print(f'  Second: {other}', file=sys.stderr)
+                sys.exit(1)
+
+        if not self.sbom:
+            return []
+
+        scanned = []
+        described: set[str] = set()
+        for src_dir in src_dirs:
+            dep_name = src_dir.name.removesuffix('-src')
+            if dep_name in described:
+                continue
+            data = self.scan(src_dir).result()
+            if data is not None:
+                described.add(dep_name)
+                self.sbom_paths[dep_name] = src_dir
+            scanned.append((dep_name, data))
+        return scanned
+
+
+def write_preload(preload_file: Path, name: str, copied_deps: dict[str, Path],
+                  archive_hashes: dict[str, str]):
+    """Write the CMake preload pointing FindOrFetch at the packaged deps."""
+    lines = [f'# Autogenerated preload for {name}']
+    for dep_name in sorted(copied_deps):
+        upper = dep_name.upper()
+        if dep_name in archive_hashes:
+            lines.append(
+                f'set(FETCHCONTENT_ARCHIVE_{upper} '
+                f'"${{CMAKE_CURRENT_LIST_DIR}}/{dep_name}.tar.gz" CACHE FILEPATH "")'
+            )
+            lines.append(
+                f'set(FETCHCONTENT_ARCHIVE_HASH_{upper} '
+                f'"{archive_hashes[dep_name]}" CACHE STRING "" FORCE)'
+            )
+            continue
+        lines.append(
+            f'set(FETCHCONTENT_SOURCE_DIR_{upper} '
+            f'"${{CMAKE_CURRENT_LIST_DIR}}/{dep_name}" CACHE PATH "")'
+        )
+    lines.append('')
+    lines.append('set(USE_FORCE_FETCH ON CACHE BOOL "")')
+    preload_file.write_text('\n'.join(lines) + '\n')
+
+
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_INOTIFY_EVENT = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Minimal recursive inotify watcher using libc through ctypes (Linux only)."""
+
+    MASK = (_IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+            | _IN_CREATE | _IN_DELETE)
+
+    def __init__(self):
+        libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify is not available on this platform')
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.watches: dict[int, Path] = {}  # watch descriptor → directory
+        self.dir_paths: set[Path] = set()  # paths reported with IN_ISDIR
+        self.overflowed = False
+
+    def add_tree(self, root: Path):
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d != '.git']
+            wd = self._libc.inotify_add_watch(
+                self.fd, os.fsencode(dirpath), self.MASK)
+            if wd >= 0:
+                self.watches[wd] = Path(dirpath)
+
+    def read(self, timeout: float | None) -> list[Path]:
+        """Return the paths changed within timeout seconds (None blocks)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.fd, 1 << 16)
+        paths = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+            name = data[offset + _INOTIFY_EVENT.size:
+                        offset + _INOTIFY_EVENT.size + length].rstrip(b'\0')
+            offset += _INOTIFY_EVENT.size + length
+
+            if mask & _IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+            if mask & _IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            base = self.watches.get(wd)
+            if base is None or not name:
+                continue
+            if mask & _IN_ISDIR and mask & _IN_ATTRIB:
+                continue
+
+            path = base / os.fsdecode(name)
+            if mask & _IN_ISDIR:
+                self.dir_paths.add(path)
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    self.add_tree(path)
+            paths.append(path)
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PackageWatcher:
+    """Push edits in the copied *-src trees into the output package."""
+
+    def __init__(self, pipeline: DependencyPipeline, scanned: list,
+                 rewrite_sbom, rewrite_preload):
+        self.pipeline = pipeline
+        self.scanned = scanned
+        self.rewrite_sbom = rewrite_sbom
+        self.rewrite_preload = rewrite_preload
+        self.roots = {src: dep for dep, src in pipeline.copied_deps.items()}
+
+    def run(self, debounce: float):
+        watcher = InotifyWatcher()
+        try:
+            for root in self.roots:
+                watcher.add_tree(root)
+            print(f'Watching {len(self.roots)} dependencies (Ctrl+C to stop)...')
+            while True:
+                pending = set(watcher.read(None))
+                while True:
+                    more = watcher.read(debounce)
+                    if not more:
+                        break
+                    pending.update(more)
+                dir_paths, watcher.dir_paths = watcher.dir_paths, set()
+                if watcher.overflowed:
+                    watcher.overflowed = False
+                    pending = set(self.roots)
+                self.apply(pending, dir_paths)
+        except KeyboardInterrupt:
+            print('Watch stopped')
+        finally:
+            watcher.close()
+
+    def apply(self, paths: set[Path], dir_paths: set[Path] = frozenset()):
+        changes: dict[Path, set[Path]] = {}
+        for path in paths:
+            for root in self.roots:
+                if path == root or path.is_relative_to(root):
+                    rel = path.relative_to(root)
+                    if '.git' not in rel.parts:
+                        changes.setdefault(root, set()).add(rel)
+                    break
+
+        sbom_dirty = preload_dirty = False
+        for root, rels in changes.items():
+            dep_name = self.roots[root]
+            # a changed directory is handled as a whole, drop paths below it
+            if Path('.') in rels:
+                rels = {Path('.')}
+            else:
+                kept: set[Path] = set()
+                for rel in sorted(rels, key=lambda r: len(r.parts)):
+                    if not any(parent in kept for parent in rel.parents):
+                        kept.add(rel)
+                rels = kept
+
+            if self.pipeline.archive:
+                archive = self.pipeline.output_dir / f'{dep_name}.tar.gz'
+                tmp = archive.with_name(archive.name + '.tmp')
+                self.pipeline.archive_hashes[dep_name] = write_archive(root, tmp)
+                os.replace(tmp, archive)
+                preload_dirty = True
+            else:
+                for rel in rels:
+                    self._sync(root, self.pipeline.output_dir / dep_name, rel)
+
+            hashes = self.pipeline.file_hashes.get(root)
+            if hashes is not None and self.pipeline.sbom_paths.get(dep_name) == root:
+                for rel in rels:
+                    self._rehash(hashes, root, rel, root / rel in dir_paths)
+                data = generate_sbom.scan_component(root, hashes)
+                self.scanned[:] = [(n, data if n == dep_name and d is not None else d)
+                                   for n, d in self.scanned]
+                sbom_dirty = True
+
+            print(f'  {dep_name}: {len(rels)} changed path(s) synced')
+
+        if preload_dirty:
+            self.rewrite_preload()
+        if sbom_dirty:
+            self.rewrite_sbom()
+
+    @staticmethod
+    def _sync(root: Path, dst_root: Path, rel: Path):
+        if '.github' in rel.parts:
+            return
+        src, dst = root / rel, dst_root / rel
+        if dst.is_dir() and not dst.is_symlink():
+            shutil.rmtree(dst)
+        elif dst.exists() or dst.is_symlink():
+            dst.unlink()
+
+        if src.is_dir():
+            shutil.copytree(src, dst, dirs_exist_ok=True,
+                            ignore=shutil.ignore_patterns('.git', '.github'))
+        elif src.exists():
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(src, dst)
+
+    @staticmethod
+    def _rehash(hashes: dict[str, str], root: Path, rel: Path, was_dir: bool):
+        src = root / rel
+        was_file = hashes.pop(str(rel), None) is not None
+
+        # only directories (or removed paths of unknown kind) need a scan of the keys below them
+        if rel == Path('.'):
+            hashes.clear()
+        elif was_dir or src.is_dir() or not (was_file or src.exists()):
+            prefix = f'{rel}{os.sep}'
+            for key in [k for k in hashes if k.startswith(prefix)]:
+                del hashes[key]
+
+        if src.is_file():
+            hashes[str(rel)] = hashlib.sha256(src.read_bytes()).hexdigest()
+        elif src.is_dir():
+            hashes.update({
+                str(rel / k) if rel != Path('.') else k: h
+                for k, h in generate_sbom.file_hashes(src).items()
+            })
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Package CMake FetchContent dependencies for offline use.'
@@ -71,12 +469,21 @@ def main():
                         help='Package name (default: offline)')
     parser.add_argument('--sbom', action='store_true',
                         help='Generate a CycloneDX 1.6 SBOM (sbom.json)')
+    parser.add_argument('--archive', action='store_true',
+                        help='Store each dependency as <dep>.tar.gz, extracted on demand')
     parser.add_argument('--work-dir', metavar='DIR',
                         help='CMake build directory (kept between runs; skips temp dir)')
     parser.add_argument('--exclude', metavar='DEP', action='append', default=[],
                         help='Exclude a dependency by name (may be repeated)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep the package in sync with source edits (needs --work-dir)')
+    parser.add_argument('--debounce', metavar='SEC', type=float, default=0.5,
+                        help='Quiet period before applying changes in --watch mode')
     args = parser.parse_args()
 
+    if args.watch and not args.work_dir:
+        parser.error('--watch requires --work-dir')
+
     source_dir = Path.cwd()
     name = args.name
     output_dir = Path(os.environ.get(
@@ -99,81 +506,55 @@ def main():
             shutil.rmtree(output_dir)
         output_dir.mkdir(parents=True)
 
-        print('Fetching dependencies via CMake...')
-        subprocess.run(
-            [
-                'cmake',
-                '-S', str(source_dir),
-                '-B', str(build_dir),
-                '-DUSE_FORCE_FETCH=ON',
-                '-DUSE_GIT_TAG=ON',
-            ],
-            check=True,
-        )
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            pipeline = DependencyPipeline(
+                pool, output_dir, args.exclude, args.sbom, args.archive,
+                keep_hashes=args.watch)
 
-        if args.sbom:
-            print('Generating SBOM...')
-            pkg_version = (
-                git('describe', '--tags', '--exact-match', 'HEAD', cwd=source_dir)
-                or git('rev-parse', '--short', 'HEAD', cwd=source_dir)
-                or 'unknown'
-            )
-            sbom_dirs = find_src_dirs(build_dir, args.exclude)
-            sbom_script = Path(__file__).parent / 'generate_sbom.py'
-            subprocess.run(
+            def on_fetched(dep_name):
+                for src_dir in announced_src_dirs(build_dir, dep_name):
+                    pipeline.submit(src_dir)
+
+            print('Fetching and copying dependencies...')
+            run_cmake_streaming(
                 [
-                    sys.executable, str(sbom_script),
-                    str(output_dir / 'sbom.json'),
-                    name,
-                    pkg_version,
-                    '--source-dir', str(source_dir),
-                    *[str(d) for d in sbom_dirs],
+                    'cmake',
+                    '-S', str(source_dir),
+                    '-B', str(build_dir),
+                    '-DUSE_FORCE_FETCH=ON',
+                    '-DUSE_GIT_TAG=ON',
                 ],
-                check=True,
+                on_fetched,
             )
 
-        print('Copying dependencies...')
-        src_dirs = find_src_dirs(build_dir, args.exclude)
+            scanned = pipeline.finish(find_src_dirs(build_dir, args.exclude))
+            copied_deps = pipeline.copied_deps
+            archive_hashes = pipeline.archive_hashes
 
-        copied_deps: dict[str, Path] = {}  # name → first source path seen
-
-        for src_dir in src_dirs:
-            dep_name = src_dir.name.removesuffix('-src')
-            dst = output_dir / dep_name
+        if not copied_deps:
+            print('ERROR: No dependencies found', file=sys.stderr)
+            sys.exit(1)
 
-            if dep_name in copied_deps:
-                if dirs_equal(copied_deps[dep_name], src_dir):
-                    print(f'  {dep_name} (skipped, duplicate)')
-                    continue
-                print(f'ERROR: Duplicate dependency {dep_name!r} with different content:',
-                      file=sys.stderr)
-                print(f'  First:  {copied_deps[dep_name]}', file=sys.stderr)
-                print(f'  Second: {src_dir}', file=sys.stderr)
-                sys.exit(1)
+        pkg_version = None
 
-            print(f'  {dep_name}')
-            shutil.copytree(
-                src_dir, dst,
-                ignore=shutil.ignore_patterns('.git', '.github'),
+        def rewrite_sbom():
+            generate_sbom.write_sbom(
+                output_dir / 'sbom.json',
+                generate_sbom.build_sbom(name, pkg_version, source_dir, scanned),
             )
-            copied_deps[dep_name] = src_dir
 
-        if not copied_deps:
-            print('ERROR: No dependencies found', file=sys.stderr)
-            sys.exit(1)
+        if args.sbom:
+            print('Generating SBOM...')
+            pkg_version = (
+                git('describe', '--tags', '--exact-match', 'HEAD', cwd=source_dir)
+                or git('rev-parse', '--short', 'HEAD', cwd=source_dir)
+                or 'unknown'
+            )
+            rewrite_sbom()
 
         preload_file = output_dir / f'{name}_preload.cmake'
         print(f'Generating {preload_file.name}...')
-        lines = [f'# Autogenerated preload for {name}']
-        for dep_name in sorted(copied_deps):
-            upper = dep_name.upper()
-            lines.append(
-                f'set(FETCHCONTENT_SOURCE_DIR_{upper} '
-                f'"${{CMAKE_CURRENT_LIST_DIR}}/{dep_name}" CACHE PATH "")'
-            )
-        lines.append('')
-        lines.append('set(USE_FORCE_FETCH ON CACHE BOOL "")')
-        preload_file.write_text('\n'.join(lines) + '\n')
+        write_preload(preload_file, name, copied_deps, archive_hashes)
 
         print('=== Done ===')
         print(f'Copied {len(copied_deps)} dependencies to: {output_dir}')
@@ -183,6 +564,12 @@ def main():
         print()
         print(f'Usage: cmake -C {preload_file} ...')
 
+        if args.watch:
+            PackageWatcher(
+                pipeline, scanned, rewrite_sbom,
+                lambda: write_preload(preload_file, name, copied_deps, archive_hashes),
+            ).run(args.debounce)
+
     finally:
         if tmp_dir:
             shutil.rmtree(tmp_dir, ignore_errors=True)